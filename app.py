@@ -1,38 +1,121 @@
-from flask import Flask, jsonify, request
-import requests
-from collections import Counter, defaultdict
-from typing import List, Dict, Any, Optional, Set, Tuple
+from flask import Flask, Response, jsonify, request
+import urllib3
+import redis
+import orjson
+import msgspec
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 import logging
 from functools import wraps
 import time
+import json
+import hashlib
 from dotenv import load_dotenv
 import os
+import sys
 from flask_cors import CORS
 app = Flask(__name__)
 
 CORS(app)
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 load_dotenv()
 
+# Set LOG_LEVEL=WARNING in production to keep per-request logging off the hot path
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
 class Config:
     BASE_URL = os.getenv("BACKEND_BASE_URL", "https://api.staging.tracevenue.com")
     ENDPOINT = os.getenv("FILTERED_VARIANTS_ENDPOINT", "/api/v1/traceVenue/variant/filteredVariants")
     TIMEOUT = int(os.getenv("TIMEOUT", "30"))
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+    POOL_CONNECTIONS = int(os.getenv("POOL_CONNECTIONS", "10"))
+    POOL_MAXSIZE = int(os.getenv("POOL_MAXSIZE", "50"))
+    REDIS_URL = os.getenv("REDIS_URL", "")
+    CACHE_TTL = int(os.getenv("CACHE_TTL", "20"))
+    STALE_CACHE_TTL = int(os.getenv("STALE_CACHE_TTL", "3600"))
+    FANOUT_WORKERS = int(os.getenv("FANOUT_WORKERS", "8"))
+    MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10"))
     
   
 config = Config()
 
+# Typed views of the external API response. Decoding straight into these skips
+# building intermediate dicts and gives attribute access in the parse loop;
+# fields not listed here are ignored, and fields only copied into the output are untyped.
+class Category(msgspec.Struct):
+    id: Any = msgspec.field(default='', name='_id')
+    name: Optional[str] = ''
+    parentCategories: Optional[List['Category']] = []
+
+class MenuItem(msgspec.Struct):
+    cuisine: Optional[List[str]] = []
+    category: Optional[List[Category]] = []
+
+class Service(msgspec.Struct):
+    serviceName: Optional[str] = ''
+
+class Variant(msgspec.Struct):
+    id: Any = msgspec.field(default='unknown', name='_id')
+    name: Any = 'unnamed'
+    packageId: Any = 'unknown'
+    menuItems: Optional[List[MenuItem]] = []
+    venueId: Any = ''
+    cost: Union[int, float] = 0
+    minPersons: Any = 0
+    maxPersons: Any = 0
+    isCustomized: Any = False
+    freeServices: Optional[List[Service]] = []
+    paidServices: Optional[List[Service]] = []
+
+class ApiResponse(msgspec.Struct):
+    variants: Optional[List[Variant]] = []
+
+def init_clients() -> None:
+    """
+    Create the upstream connection pool, fan-out executor and Redis client.
+    Called at import and again in each Gunicorn worker after fork (see gunicorn_conf.py),
+    so workers never share sockets or threads inherited from the master process.
+    """
+    global _http, _fetch_executor, _redis
+    
+    # Shared connection pool so upstream calls reuse keep-alive connections instead of
+    # paying a fresh TCP/TLS handshake on every request. Retries are handled by
+    # the explicit backoff loop in fetch_variants_data.
+    _http = urllib3.PoolManager(
+        num_pools=config.POOL_CONNECTIONS,
+        maxsize=config.POOL_MAXSIZE,
+        block=True,
+        retries=False,
+        headers={
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        }
+    )
+    
+    # Threads used to issue the upstream calls of a batched request concurrently
+    _fetch_executor = ThreadPoolExecutor(max_workers=config.FANOUT_WORKERS)
+    
+    # Response cache; disabled when REDIS_URL is not configured
+    _redis = redis.Redis(connection_pool=redis.ConnectionPool.from_url(config.REDIS_URL)) if config.REDIS_URL else None
+
+init_clients()
+
+class UpstreamAPIError(Exception):
+    """
+    The external API kept answering with an HTTP error status after all retries,
+    or returned a body that could not be decoded
+    """
+
 def handle_api_errors(f):
     """Decorator to handle API errors gracefully"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
             return f(*args, **kwargs)
-        except requests.exceptions.RequestException as e:
+        except (urllib3.exceptions.HTTPError, UpstreamAPIError) as e:
             logger.error(f"API request failed: {str(e)}")
             return jsonify({
                 'error': 'Failed to fetch data from external API',
@@ -46,113 +129,216 @@ def handle_api_errors(f):
             }), 500
     return decorated_function
 
-def fetch_variants_data(request_payload: Dict[str, Any]) -> Dict[str, Any]:
+def fetch_variants_response(request_payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> urllib3.HTTPResponse:
     """
-    Fetch variants data from the external API
+    Send the variants request to the external API, retrying failed attempts
     
     Args:
         request_payload: Request payload to send to the API (required)
+        headers: Extra request headers, e.g. conditional request validators
         
     Returns:
-        API response data
+        Successful (2xx) or 304 Not Modified upstream response. For a conditional
+        request, 412 Precondition Failed is also returned without retrying: on a
+        POST it is how a matching If-None-Match is reported (RFC 9110).
     """
     url = f"{config.BASE_URL}{config.ENDPOINT}"
-    
-    headers = {
-        'Content-Type': 'application/json',
-        'Accept': 'application/json',
-    }
+    request_headers = {**_http.headers, **headers} if headers else None
     
     for attempt in range(config.MAX_RETRIES):
         try:
-            logger.info(f"Fetching data from {url} (attempt {attempt + 1})")
-            logger.info(f"Payload: {request_payload}")
-            logger.info(f"Headers: {headers}")
+            logger.debug("Fetching data from %s (attempt %d)", url, attempt + 1)
+            logger.debug("Payload: %s", request_payload)
+            logger.debug("Headers: %s", request_headers or _http.headers)
             
-            response = requests.post(
-                url, 
-                json=request_payload, 
-                headers=headers, 
+            response = _http.request(
+                'POST',
+                url,
+                body=orjson.dumps(request_payload),
+                headers=request_headers,
                 timeout=config.TIMEOUT
             )
             
-            logger.info(f"Response Status: {response.status_code}")
-            logger.info(f"Response Headers: {dict(response.headers)}")
+            logger.debug("Response Status: %s", response.status)
+            logger.debug("Response Headers: %s", response.headers)
             
-            response_text = response.text
-            logger.info(f"Response Content (first 500 chars): {response_text[:500]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Response Content (first 500 chars): %s...", response.data[:500].decode('utf-8', errors='replace'))
             
-            response.raise_for_status()
-            return response.json()
+            if response.status == 412 and headers:
+                return response
             
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP Error {response.status_code}: {response.text}")
-            if attempt == config.MAX_RETRIES - 1:
-                raise Exception(f"API returned {response.status_code}: {response.text}")
-            logger.warning(f"Attempt {attempt + 1} failed with HTTP error. Retrying...")
-            time.sleep(2 ** attempt)
+            if response.status >= 400:
+                response_text = response.data.decode('utf-8', errors='replace')
+                logger.error(f"HTTP Error {response.status}: {response_text}")
+                if attempt == config.MAX_RETRIES - 1:
+                    raise UpstreamAPIError(f"API returned {response.status}: {response_text}")
+                logger.warning(f"Attempt {attempt + 1} failed with HTTP error. Retrying...")
+                time.sleep(2 ** attempt)
+                continue
+            
+            return response
             
-        except requests.exceptions.RequestException as e:
+        except urllib3.exceptions.HTTPError as e:
             logger.error(f"Request failed: {str(e)}")
             if attempt == config.MAX_RETRIES - 1:
                 raise
             logger.warning(f"Attempt {attempt + 1} failed: {str(e)}. Retrying...")
             time.sleep(2 ** attempt)
 
-def extract_categories_from_menu_item(menu_item: Dict) -> Set[Tuple[str, str]]:
-    """
-    Extract categories from a menu item, prioritizing parent categories.
-    Returns set of (category_id, category_name) tuples.
+def decode_api_response(body: bytes) -> ApiResponse:
+    """Decode an external API response body, treating malformed data as an upstream failure"""
+    try:
+        return msgspec.json.decode(body, type=ApiResponse)
+    except msgspec.DecodeError as e:
+        raise UpstreamAPIError(f"API returned an invalid response: {str(e)}") from e
+
+def fetch_variants_data(request_payload: Dict[str, Any]) -> ApiResponse:
     """
-    categories = set()
+    Fetch variants data from the external API
     
-    for category in menu_item.get('category', []):
-        parent_categories = category.get('parentCategories', [])
+    Args:
+        request_payload: Request payload to send to the API (required)
         
-        if parent_categories:
-            # Use parent category if available
-            for parent_cat in parent_categories:
-                categories.add((parent_cat.get('_id', ''), parent_cat.get('name', '')))
-        else:
-            # Use original category if no parent category
-            categories.add((category.get('_id', ''), category.get('name', '')))
+    Returns:
+        API response data
+    """
+    return decode_api_response(fetch_variants_response(request_payload).data)
+
+def fetch_variants_revalidated(request_payload: Dict[str, Any], cache_key: str) -> Tuple[Optional[ApiResponse], Dict[str, str]]:
+    """
+    Fetch variants data, sending the ETag/Last-Modified validators stored with the
+    cached response so the external API can answer 304 Not Modified (or 412
+    Precondition Failed, its equivalent for POST).
     
-    return categories
+    Args:
+        request_payload: Request payload to send to the API (required)
+        cache_key: Cache key of the response built from this payload
+        
+    Returns:
+        Tuple of (api_response, validators). api_response is None when the
+        external API reports the cached response is still current.
+    """
+    cached_validators = get_cached_validators(cache_key)
+    conditional_headers = {}
+    if 'etag' in cached_validators:
+        conditional_headers['If-None-Match'] = cached_validators['etag']
+    if 'last_modified' in cached_validators:
+        conditional_headers['If-Modified-Since'] = cached_validators['last_modified']
+    
+    response = fetch_variants_response(request_payload, conditional_headers)
+    if response.status in (304, 412):
+        return None, cached_validators
+    
+    validators = {}
+    if response.headers.get('ETag'):
+        validators['etag'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        validators['last_modified'] = response.headers['Last-Modified']
+    
+    return decode_api_response(response.data), validators
 
-def extract_services_from_variant(variant: Dict) -> Tuple[List[str], List[str]]:
+def fetch_variants_batch(request_payloads: List[Dict[str, Any]]) -> ApiResponse:
     """
-    Extract free and paid services from a variant's freeServices and paidServices arrays.
+    Fetch variants data for several payloads concurrently and merge the results
     
     Args:
-        variant: Variant dictionary containing freeServices and paidServices arrays
+        request_payloads: Request payloads to send to the API
         
     Returns:
-        Tuple of (free_services_names, paid_services_names)
+        API response data with the variants of all payloads, in payload order
+    """
+    if len(request_payloads) == 1:
+        return fetch_variants_data(request_payloads[0])
+    
+    api_responses = _fetch_executor.map(fetch_variants_data, request_payloads)
+    merged_variants = list(chain.from_iterable(api_response.variants or () for api_response in api_responses))
+    
+    return ApiResponse(variants=merged_variants)
+
+def build_cache_key(request_payload: Any, options: Dict[str, bool]) -> str:
     """
-    free_services = []
-    paid_services = []
-    
-    # Extract free services
-    free_services_array = variant.get('freeServices', [])
-    for service in free_services_array:
-        service_name = service.get('serviceName', '')
-        if service_name:
-            free_services.append(service_name)
-    
-    # Extract paid services
-    paid_services_array = variant.get('paidServices', [])
-    for service in paid_services_array:
-        service_name = service.get('serviceName', '')
-        if service_name:
-            paid_services.append(service_name)
-    
-    return free_services, paid_services
-
-def parse_restaurant_variants(api_response: Dict[str, Any]) -> Dict[str, Any]:
+    Build the response cache key from the upstream payload and the response shaping options.
+    """
+    key_source = json.dumps({'payload': request_payload, 'options': options}, sort_keys=True)
+    return "cuisine:" + hashlib.sha256(key_source.encode()).hexdigest()
+
+def get_cached_response(key: str) -> Optional[bytes]:
+    """Return the cached response body for key, or None on a miss or cache failure"""
+    if _redis is None:
+        return None
+    try:
+        return _redis.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Cache lookup failed: {str(e)}")
+        return None
+
+def get_cached_validators(key: str) -> Dict[str, str]:
+    """Return the upstream ETag/Last-Modified validators stored with the cached response for key"""
+    if _redis is None:
+        return {}
+    try:
+        stored = _redis.hgetall(f"{key}:validators")
+    except redis.RedisError as e:
+        logger.warning(f"Cache lookup failed: {str(e)}")
+        return {}
+    return {field.decode(): value.decode() for field, value in stored.items()}
+
+def clear_cached_validators(key: str) -> None:
+    """Delete the upstream validators stored for key"""
+    if _redis is None:
+        return
+    try:
+        _redis.delete(f"{key}:validators")
+    except redis.RedisError as e:
+        logger.warning(f"Cache delete failed: {str(e)}")
+
+def cache_response(key: str, body: bytes, validators: Optional[Dict[str, str]] = None) -> None:
+    """
+    Store a response body under key, plus a longer-lived stale copy used as a
+    fallback when the external API is unavailable and for 304 revalidation.
+    The upstream validators are kept alongside the stale copy.
+    """
+    if _redis is None:
+        return
+    try:
+        pipe = _redis.pipeline()
+        pipe.setex(key, config.CACHE_TTL, body)
+        pipe.setex(f"{key}:stale", config.STALE_CACHE_TTL, body)
+        pipe.delete(f"{key}:validators")
+        if validators:
+            pipe.hset(f"{key}:validators", mapping=validators)
+            pipe.expire(f"{key}:validators", config.STALE_CACHE_TTL)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Cache store failed: {str(e)}")
+
+def iter_mask_bits(mask: int) -> Iterator[int]:
+    """Yield the indices of the set bits in mask, lowest first"""
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+def new_combination_group() -> Dict[str, Any]:
+    """Empty per-combination aggregate, filled incrementally while parsing variants"""
+    return {
+        'variants': [],
+        'categories': set(),
+        'category_names': set(),
+        'free_services': set(),
+        'paid_services': set(),
+        'venues': set(),
+        'costs': [],
+        'menu_items': 0
+    }
+
+def parse_restaurant_variants(api_response: ApiResponse, include_all_cuisine_ids: bool = True) -> Dict[str, Any]:
     """
     Parse restaurant variants data to extract cuisine combinations and detailed statistics.
+    The sorted all_cuisine_ids list is only built when include_all_cuisine_ids is set.
     """
-    variants = api_response.get('variants', [])
+    variants = api_response.variants
     if not variants:
         return {
             'restaurant_data': [],
@@ -166,72 +352,110 @@ def parse_restaurant_variants(api_response: Dict[str, Any]) -> Dict[str, Any]:
             }
         }
     
-    restaurant_id = variants[0].get('packageId', 'unknown')
+    restaurant_id = variants[0].packageId
     
-    restaurant_variants = []
-    cuisine_combinations = []
-    all_cuisine_ids = set()
+    restaurant_variants = [None] * len(variants)
+    # Dense integer code for each distinct cuisine ID, assigned on first sight;
+    # its keys are the set of all cuisine IDs seen in the response
+    cuisine_idx: Dict[str, int] = {}
+    # Variants and their aggregates grouped by cuisine combination, filled in the main loop.
+    # A combination is keyed by its bitmask over the cuisine codes.
+    combination_groups = defaultdict(new_combination_group)
+    cuisine_code = cuisine_idx.setdefault
+    # Service and category names repeat across variants and are kept in every
+    # variant record, so intern them to hold one copy of each
+    intern = sys.intern
     
     # Process each variant
-    for variant in variants:
-        variant_id = variant.get('_id', 'unknown')
-        variant_name = variant.get('name', 'unnamed')
-        menu_items = variant.get('menuItems', [])
-        venue_id = variant.get('venueId', '')
-        cost = variant.get('cost', 0)
+    for variant_index, variant in enumerate(variants):
+        variant_id = variant.id
+        variant_name = variant.name
+        menu_items = variant.menuItems or ()
+        venue_id = variant.venueId
+        cost = variant.cost
+        
+        # Extract free and paid service names
+        free_services_names = []
+        for service in variant.freeServices or ():
+            service_name = service.serviceName
+            if service_name:
+                free_services_names.append(intern(service_name))
         
-        # Extract services using the new function
-        free_services_names, paid_services_names = extract_services_from_variant(variant)
+        paid_services_names = []
+        for service in variant.paidServices or ():
+            service_name = service.serviceName
+            if service_name:
+                paid_services_names.append(intern(service_name))
         
-        variant_cuisines = set()
+        cuisine_mask = 0
         variant_categories = set()
+        add_category = variant_categories.add
         
         for menu_item in menu_items:
             # Extract cuisines
-            cuisines = menu_item.get('cuisine', [])
-            for cuisine_id in cuisines:
-                variant_cuisines.add(cuisine_id)
-                all_cuisine_ids.add(cuisine_id)
+            for cuisine_id in menu_item.cuisine or ():
+                cuisine_mask |= 1 << cuisine_code(cuisine_id, len(cuisine_idx))
             
-            # Extract categories
-            categories = extract_categories_from_menu_item(menu_item)
-            variant_categories.update(categories)
-        
-        variant_cuisine_list = sorted(list(variant_cuisines))
+            # Extract (category_id, category_name) pairs, using parent categories when available
+            for category in menu_item.category or ():
+                for source_category in category.parentCategories or (category,):
+                    category_id = source_category.id
+                    category_name = source_category.name
+                    add_category((
+                        intern(category_id) if isinstance(category_id, str) and category_id else category_id,
+                        intern(category_name) if category_name else category_name
+                    ))
         
-        restaurant_variants.append({
+        # Cuisine lists are filled in once per combination after the loop
+        variant_record = {
             'variant_id': variant_id,
             'variant_name': variant_name,
-            'cuisines': variant_cuisine_list,
-            'cuisine_count': len(variant_cuisine_list),
+            'cuisines': None,
+            'cuisine_count': 0,
             'menu_items_count': len(menu_items),
             'categories': list(variant_categories),
             'categories_count': len(variant_categories),
             'cost': cost,
-            'min_persons': variant.get('minPersons', 0),
-            'max_persons': variant.get('maxPersons', 0),
-            'is_customized': variant.get('isCustomized', False),
+            'min_persons': variant.minPersons,
+            'max_persons': variant.maxPersons,
+            'is_customized': variant.isCustomized,
             'venue_id': venue_id,
             'free_services': free_services_names,
             'paid_services': paid_services_names,
             'free_services_count': len(free_services_names),
             'paid_services_count': len(paid_services_names)
-        })
+        }
+        restaurant_variants[variant_index] = variant_record
         
-        if variant_cuisine_list:
-            cuisine_combinations.append(tuple(variant_cuisine_list))
-    
-    # Group variants by cuisine combination
-    combination_groups = defaultdict(list)
-    for variant in restaurant_variants:
-        combination_key = tuple(variant['cuisines'])
-        combination_groups[combination_key].append(variant)
-    
-    # Calculate detailed statistics for each combination
+        group = combination_groups[cuisine_mask]
+        group['variants'].append(variant_record)
+        group['categories'] |= variant_categories
+        group['category_names'].update(name for _, name in variant_categories if name)
+        group['free_services'].update(free_services_names)
+        group['paid_services'].update(paid_services_names)
+        if venue_id:
+            group['venues'].add(venue_id)
+        if cost > 0:
+            group['costs'].append(cost)
+        group['menu_items'] += len(menu_items)
+    
+    # Cuisine ID for each code; dict order matches code assignment order
+    cuisine_ids = list(cuisine_idx)
+    
+    # Calculate detailed statistics for each combination, most frequent first
     formatted_combinations = []
-    for combination, variants_in_combo in combination_groups.items():
+    sorted_groups = sorted(combination_groups.items(), key=lambda kv: -len(kv[1]['variants']))
+    for cuisine_mask, group in sorted_groups:
+        variants_in_combo = group['variants']
+        
+        # Built once per distinct mask and shared by every variant in the group
+        combination = sorted(cuisine_ids[i] for i in iter_mask_bits(cuisine_mask))
+        for variant in variants_in_combo:
+            variant['cuisines'] = combination
+            variant['cuisine_count'] = len(combination)
+        
         # Price range statistics
-        costs = [v['cost'] for v in variants_in_combo if v['cost'] > 0]
+        costs = group['costs']
         price_range = {
             'min_price': min(costs) if costs else 0,
             'max_price': max(costs) if costs else 0,
@@ -246,35 +470,22 @@ def parse_restaurant_variants(api_response: Dict[str, Any]) -> Dict[str, Any]:
         }
         
         # Menu items and categories statistics
-        total_menu_items = sum(v['menu_items_count'] for v in variants_in_combo)
-        all_categories = set()
-        for variant in variants_in_combo:
-            all_categories.update(variant['categories'])
-        
         menu_stats = {
-            'total_menu_items': total_menu_items,
-            'total_unique_categories': len(all_categories),
-            'category_names': [cat[1] for cat in all_categories if cat[1]]  # Extract category names
+            'total_menu_items': group['menu_items'],
+            'total_unique_categories': len(group['categories']),
+            'category_names': list(group['category_names'])
         }
         
         # Unique venues
-        unique_venues = set(v['venue_id'] for v in variants_in_combo if v['venue_id'])
+        unique_venues = group['venues']
         venue_stats = {
             'total_unique_venues': len(unique_venues),
             'venue_ids': list(unique_venues)
         }
         
         # Free and paid services statistics - Updated to use proper service names
-        all_free_services = []
-        all_paid_services = []
-        
-        for variant in variants_in_combo:
-            all_free_services.extend(variant['free_services'])
-            all_paid_services.extend(variant['paid_services'])
-        
-        # Get unique service names
-        unique_free_services = list(set(all_free_services))
-        unique_paid_services = list(set(all_paid_services))
+        unique_free_services = list(group['free_services'])
+        unique_paid_services = list(group['paid_services'])
         
         service_stats = {
             'total_unique_free_services': len(unique_free_services),
@@ -307,16 +518,13 @@ def parse_restaurant_variants(api_response: Dict[str, Any]) -> Dict[str, Any]:
             'service_stats': service_stats
         })
     
-    # Sort combinations by frequency
-    formatted_combinations.sort(key=lambda x: x['frequency'], reverse=True)
-    
     restaurant_data = [{
         'restaurant_id': restaurant_id,
         'total_variants': len(variants),
         'variants': restaurant_variants
     }]
     
-    all_cuisine_ids_list = sorted(list(all_cuisine_ids))
+    all_cuisine_ids_list = sorted(cuisine_idx) if include_all_cuisine_ids else []
     
     return {
         'restaurant_data': restaurant_data,
@@ -325,7 +533,7 @@ def parse_restaurant_variants(api_response: Dict[str, Any]) -> Dict[str, Any]:
         'summary': {
             'total_variants': len(variants),
             'total_unique_cuisine_combinations': len(formatted_combinations),
-            'total_unique_cuisines': len(all_cuisine_ids_list),
+            'total_unique_cuisines': len(cuisine_idx),
             'restaurant_id': restaurant_id
         }
     }
@@ -337,7 +545,9 @@ def get_cuisine_analysis():
     """
     Get comprehensive cuisine analysis for restaurant variants
     
-    For POST requests, send the payload in request body
+    For POST requests, send the payload in request body. The body may also be a
+    list of up to MAX_BATCH_SIZE payload objects; they are fetched concurrently and
+    their variants analysed together
     For GET requests, parameters are converted to payload
     
     Query Parameters (GET) or Body Parameters (POST):
@@ -347,6 +557,7 @@ def get_cuisine_analysis():
     - include_summary: Include summary statistics (default: true)
     - include_variants: Include detailed variant data (default: true)
     - include_combinations: Include cuisine combinations (default: true)
+    - include_all_cuisines: Include the sorted list of all cuisine IDs (default: true)
     - Any other parameters your external API expects
     
     Returns:
@@ -365,10 +576,21 @@ def get_cuisine_analysis():
                 'error': 'Missing request payload',
                 'message': 'POST request requires a JSON payload'
             }), 400
+        if isinstance(request_payload, list):
+            if len(request_payload) > config.MAX_BATCH_SIZE:
+                return jsonify({
+                    'error': 'Batch too large',
+                    'message': f'A batched request may contain at most {config.MAX_BATCH_SIZE} payloads'
+                }), 400
+            if not all(isinstance(payload, dict) for payload in request_payload):
+                return jsonify({
+                    'error': 'Invalid request payload',
+                    'message': 'Each payload in a batched request must be a JSON object'
+                }), 400
     else:
         request_payload = {}
         for key, value in request.args.items():
-            if key not in ['include_summary', 'include_variants', 'include_combinations']:
+            if key not in ['include_summary', 'include_variants', 'include_combinations', 'include_all_cuisines']:
                 request_payload[key] = value
         
         if not request_payload:
@@ -380,11 +602,46 @@ def get_cuisine_analysis():
     include_summary = request.args.get('include_summary', 'true').lower() == 'true'
     include_variants = request.args.get('include_variants', 'true').lower() == 'true'
     include_combinations = request.args.get('include_combinations', 'true').lower() == 'true'
+    include_all_cuisines = request.args.get('include_all_cuisines', 'true').lower() == 'true'
     
-    logger.info(f"Fetching variants data with payload: {request_payload}")
-    api_response = fetch_variants_data(request_payload)
+    cache_key = build_cache_key(request_payload, {
+        'include_summary': include_summary,
+        'include_variants': include_variants,
+        'include_combinations': include_combinations,
+        'include_all_cuisines': include_all_cuisines
+    })
+    cached_body = get_cached_response(cache_key)
+    if cached_body is not None:
+        logger.debug("Serving cuisine analysis from cache")
+        return Response(cached_body, mimetype='application/json')
+    
+    request_payloads = request_payload if isinstance(request_payload, list) else [request_payload]
+    
+    logger.debug("Fetching variants data with payload: %s", request_payload)
+    validators = {}
+    try:
+        if len(request_payloads) == 1:
+            api_response, validators = fetch_variants_revalidated(request_payloads[0], cache_key)
+            if api_response is None:
+                revalidated_body = get_cached_response(f"{cache_key}:stale")
+                if revalidated_body is not None:
+                    logger.info("External API data not modified, serving cached response")
+                    cache_response(cache_key, revalidated_body, validators)
+                    return Response(revalidated_body, mimetype='application/json')
+                # Cached copy expired or was evicted; drop the orphaned validators
+                # so later requests stop revalidating against a body we no longer have
+                clear_cached_validators(cache_key)
+                api_response, validators = fetch_variants_data(request_payloads[0]), {}
+        else:
+            api_response = fetch_variants_batch(request_payloads)
+    except (urllib3.exceptions.HTTPError, UpstreamAPIError):
+        stale_body = get_cached_response(f"{cache_key}:stale")
+        if stale_body is None:
+            raise
+        logger.warning("External API unavailable, serving stale cached response")
+        return Response(stale_body, mimetype='application/json')
     
-    parsed_data = parse_restaurant_variants(api_response)
+    parsed_data = parse_restaurant_variants(api_response, include_all_cuisine_ids=include_all_cuisines)
     
     response_data = {}
     
@@ -397,10 +654,16 @@ def get_cuisine_analysis():
     if include_combinations:
         response_data['sorted_cuisine_combinations'] = parsed_data['sorted_cuisine_combinations']
     
-    response_data['all_cuisine_ids'] = parsed_data['all_cuisine_ids']
+    if include_all_cuisines:
+        response_data['all_cuisine_ids'] = parsed_data['all_cuisine_ids']
     
-    logger.info(f"Successfully processed {parsed_data['summary']['total_variants']} variants")
-    return jsonify(response_data)
+    logger.info("Successfully processed %d variants", parsed_data['summary']['total_variants'])
+    response = app.response_class(
+        orjson.dumps(response_data, option=orjson.OPT_NON_STR_KEYS),
+        mimetype='application/json'
+    )
+    cache_response(cache_key, response.get_data(), validators)
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -420,5 +683,7 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
+    # Development server only; in production run under Gunicorn:
+    #   gunicorn -c gunicorn_conf.py app:app
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port)
\ No newline at end of file
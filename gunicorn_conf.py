@@ -0,0 +1,18 @@
+import multiprocessing
+import os
+
+# Run with: gunicorn -c gunicorn_conf.py app:app
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = 60
+keepalive = 5
+
+# Load the app once in the master and fork it into the workers
+preload_app = True
+
+def post_fork(server, worker):
+    """Give each worker its own upstream connection pool, executor and Redis client"""
+    import app
+    app.init_clients()